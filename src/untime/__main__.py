@@ -1,34 +1,111 @@
+import glob
 import json
+import pathlib
+import sys
 
 import click
 
-from .complexity import analyze_file
+from .complexity import analyze_files
 
 
 @click.group()
 def cli(): ...
 
 
+def _find_sources(input_path: str) -> list:
+    """
+    Expand a directory or glob pattern into the Python files it names.
+
+    Args:
+        input_path: A directory to search recursively, or a glob pattern.
+
+    Returns:
+        A sorted list of file paths.
+    """
+
+    path = pathlib.Path(input_path)
+
+    if path.is_dir():
+        return sorted(
+            str(source) for source in path.rglob("*.py") if source.is_file()
+        )
+
+    return sorted(
+        source
+        for source in glob.glob(input_path, recursive=True)
+        if pathlib.Path(source).is_file()
+    )
+
+
 @cli.command('analyze')
 @click.option(
     "-i",
     "--input-path",
-    type=click.Path(exists=True, dir_okay=False, file_okay=True),
-    help="Analyze a Python file for McCabe complexity.",
+    required=True,
+    help=(
+        "Analyze a Python file for McCabe complexity. A directory or glob "
+        "pattern analyzes every matching file."
+    ),
 )
-def run_analysis(input_path: str):
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes for a batch of files. Defaults to the CPU count.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Ignore and do not write cached scores.",
+)
+def run_analysis(input_path: str, jobs: int | None, no_cache: bool):
     """
-    Analyzes a file, emits a report.
+    Analyzes a file, or a batch of files, emits a report.
 
     Args:
-        input_file: Path to file to scan
+        input_file: Path to file, directory or glob pattern to scan
+        jobs: Number of worker processes for a batch
+        no_cache: Skip the on-disk score cache
     """
 
-    scores, total_score = analyze_file(input_path)
+    if pathlib.Path(input_path).is_file():
+        input_paths = None
+    else:
+        input_paths = _find_sources(input_path)
+
+        if not input_paths:
+            raise click.BadParameter(
+                f"no Python files match {input_path!r}", param_hint="'-i'"
+            )
+
+    use_cache = not no_cache
+    errors = []
+
+    if input_paths is None:
+        [(_, report, _, error)] = analyze_files([input_path], use_cache=use_cache)
+
+        if error:
+            raise click.ClickException(error)
+    else:
+        report = {}
+        results = analyze_files(input_paths, jobs=jobs, use_cache=use_cache)
+
+        for path, scores, total_score, error in results:
+            if error:
+                errors.append(error)
+            else:
+                report[path] = scores
+
+        report = dict(sorted(report.items()))
+
+    click.echo(json.dumps(report, indent=2))
 
-    digest = {rule: score for (rule, score) in scores.items()}
+    for error in sorted(errors):
+        click.echo(f"Error: {error}", err=True)
 
-    click.echo(json.dumps(digest, indent=2))
+    if errors:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import pathlib
+import sys
+
+# Bump whenever a rule changes how files are scored, or the cached payload
+# changes shape, so that stale entries stop matching.
+SCORE_VERSION = 5
+
+
+def cache_dir() -> pathlib.Path:
+    """
+    Locate the directory holding cached scores.
+
+    Returns:
+        `$XDG_CACHE_HOME/untime`, falling back to `~/.cache/untime`.
+    """
+
+    base = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    return pathlib.Path(base) / "untime"
+
+
+def cache_key(path: pathlib.Path) -> str:
+    """
+    Build the cache key for a source file.
+
+    The key names one cache entry per source file. It changes when the Python
+    version or `SCORE_VERSION` changes, since either may change the parse or
+    the scores; modifications to the file are caught by `file_stamp`.
+
+    Args:
+        path: The path to the Python file.
+
+    Returns:
+        A hex digest identifying the file.
+    """
+
+    parts = (str(path.resolve()), sys.version, f"scores-v{SCORE_VERSION}")
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def file_stamp(path: pathlib.Path) -> list:
+    """
+    Record the version of a source file that cached scores belong to.
+
+    Args:
+        path: The path to the Python file.
+
+    Returns:
+        The file's modification time in nanoseconds and its size.
+    """
+
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_scores(key: str, stamp: list, size: int) -> list | None:
+    """
+    Load cached scores.
+
+    Args:
+        key: A key from `cache_key`.
+        stamp: The file's current stamp, from `file_stamp`.
+        size: The number of scores expected.
+
+    Returns:
+        The cached scores, or None if there are none, they are unreadable,
+        they were stored for a different stamp, or they are not a list of
+        `size` numbers.
+    """
+
+    try:
+        payload = json.loads((cache_dir() / f"{key}.json").read_bytes())
+    except (OSError, ValueError):
+        return None
+
+    if type(payload) is not dict or payload.get("stamp") != stamp:
+        return None
+
+    scores = payload.get("scores")
+
+    if (
+        type(scores) is not list
+        or len(scores) != size
+        or not all(type(score) in (int, float) for score in scores)
+    ):
+        return None
+
+    return scores
+
+
+def store_scores(key: str, stamp: list, scores: list) -> None:
+    """
+    Cache scores on disk, replacing any entry for an older version of the
+    file. Failing to write the cache is not an error.
+
+    Args:
+        key: A key from `cache_key`.
+        stamp: The stamp of the file the scores were computed from.
+        scores: The scores to cache.
+    """
+
+    directory = cache_dir()
+    target = directory / f"{key}.json"
+    partial = directory / f"{key}.{os.getpid()}.tmp"
+
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        partial.write_text(json.dumps({"stamp": stamp, "scores": scores}))
+        os.replace(partial, target)
+    except OSError:
+        pass
@@ -1,59 +1,103 @@
 import ast
+import functools
+import multiprocessing
+import os
 import pathlib
 
-from .rules import *  # noqa
+from . import cache
+from .rules import METRIC_NAMES, MetricVisitor
 
 
-def analyze_file(input_path: str):
+def collect(tree) -> list:
+    """
+    Visit the AST once and score every metric.
+
+    Args:
+        tree: The AST of the Python file.
+
+    Returns:
+        A list of complexity scores, in the order of `METRIC_NAMES`.
+    """
+
+    visitor = MetricVisitor()
+    visitor.visit(tree)
+    return visitor.scores()
+
+
+def analyze_file(input_path: str, use_cache: bool = True):
     """
     Analyze the complexity of a Python file.
 
+    Scores are cached on disk, one entry per file, stamped with the file's
+    modification time and size, so unchanged files are not parsed again.
+
     Args:
         input_path: The path to the Python file to analyze.
+        use_cache: Whether to read and write cached scores.
 
     Returns:
         A tuple containing a dictionary of complexity scores and the total score
     """
 
-    with pathlib.Path(input_path).open("r") as source:
-        tree = ast.parse(source.read())
-
-    class_names = {
-        node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)
-    }
-    global_vars = {node.id for node in ast.walk(tree) if isinstance(node, ast.Global)}
-    class_methods = {
-        method.name
-        for cls in ast.walk(tree)
-        if isinstance(cls, ast.ClassDef)
-        for method in cls.body
-        if isinstance(method, ast.FunctionDef)
-    }
-
-    scores = {
-        "cyclomatic_complexity": calculate_cyclomatic_complexity(tree),
-        "nesting_depth": calculate_nesting_depth(tree),
-        "function_length": sum(
-            calculate_function_length(node) for node in ast.walk(tree)
-        ),
-        "parameter_count": sum(
-            calculate_parameter_count(node) for node in ast.walk(tree)
-        ),
-        "class_coupling": sum(
-            calculate_class_coupling(node, class_names) for node in ast.walk(tree)
-        ),
-        "cohesion": sum(calculate_cohesion(node) for node in ast.walk(tree)),
-        "global_variable_usage": calculate_global_variable_usage(tree, global_vars),
-        "inheritance_depth": calculate_inheritance_depth(tree),
-        "number_of_interfaces": sum(
-            calculate_number_of_interfaces(node) for node in ast.walk(tree)
-        ),
-        "polymorphism": sum(
-            calculate_polymorphism(node, class_methods) for node in ast.walk(tree)
-        ),
-        'calculate_import_complexity': calculate_import_complexity(tree),
-    }
-
-    total_score = sum(scores.values()) / len(scores)
+    path = pathlib.Path(input_path)
+    key = cache.cache_key(path) if use_cache else None
+    stamp = cache.file_stamp(path) if key else None
+    values = cache.load_scores(key, stamp, len(METRIC_NAMES)) if key else None
+
+    if values is None:
+        source = path.read_bytes()
+        tree = ast.parse(source, filename=input_path, type_comments=False)
+        values = collect(tree)
+
+        if key:
+            cache.store_scores(key, stamp, values)
+
+    scores = dict(zip(METRIC_NAMES, values))
+    total_score = sum(values) / len(values)
 
     return scores, total_score
+
+
+def _analyze_path(input_path: str, use_cache: bool):
+    try:
+        scores, total_score = analyze_file(input_path, use_cache=use_cache)
+    except SyntaxError as e:
+        location = f"{input_path}:{e.lineno}" if e.lineno else input_path
+        return input_path, None, None, f"{location}: {e.msg}"
+
+    return input_path, scores, total_score, None
+
+
+def analyze_files(input_paths, jobs: int | None = None, use_cache: bool = True):
+    """
+    Analyze the complexity of many Python files, in parallel.
+
+    Each file is parsed and scored in its own worker process. Nothing is
+    shared between tasks, so results arrive in completion order. A file that
+    fails to parse does not stop the batch; its error is reported in its
+    result instead.
+
+    Args:
+        input_paths: A list of paths to the Python files to analyze.
+        jobs: The number of worker processes. Defaults to the CPU count. With
+            one job, or one file, files are analyzed in this process.
+        use_cache: Whether to read and write cached scores.
+
+    Yields:
+        A tuple of the file path, its dictionary of complexity scores, its
+        total score, and an error message. The message is None for files that
+        were scored; for files that failed to parse, the scores and total
+        score are None.
+    """
+
+    worker = functools.partial(_analyze_path, use_cache=use_cache)
+
+    if jobs == 1 or len(input_paths) < 2:
+        yield from map(worker, input_paths)
+        return
+
+    processes = min(jobs or os.cpu_count() or 1, len(input_paths))
+    chunksize = max(1, min(16, len(input_paths) // (processes * 4)))
+
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(worker, input_paths, chunksize=chunksize)
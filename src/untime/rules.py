@@ -1,132 +1,383 @@
 import ast
-
-
-def calculate_cyclomatic_complexity(node) -> float:
+import collections
+
+FUNC_TYPES = frozenset({ast.FunctionDef, ast.AsyncFunctionDef})
+CC_TYPES = frozenset(
+    {
+        ast.If,
+        ast.For,
+        ast.AsyncFor,
+        ast.While,
+        ast.With,
+        ast.AsyncWith,
+        ast.Try,
+        ast.TryStar,
+        ast.ExceptHandler,
+        ast.Match,
+        ast.match_case,
+    }
+)
+NEST_TYPES = frozenset(
+    {
+        ast.If,
+        ast.For,
+        ast.AsyncFor,
+        ast.While,
+        ast.With,
+        ast.AsyncWith,
+        ast.Try,
+        ast.TryStar,
+        ast.Match,
+    }
+)
+
+_SCALAR_FIELDS = frozenset(
+    {
+        "arg",
+        "asname",
+        "attr",
+        "conversion",
+        "ctx",
+        "id",
+        "is_async",
+        "kind",
+        "kwd_attrs",
+        "level",
+        "module",
+        "simple",
+        "tag",
+        "type_comment",
+    }
+)
+
+
+def _node_classes(base=ast.AST):
+    for cls in base.__subclasses__():
+        yield cls
+        yield from _node_classes(cls)
+
+
+NODE_CHILD_FIELDS = {
+    cls: tuple(name for name in cls._fields if name not in _SCALAR_FIELDS)
+    for cls in _node_classes()
+}
+NODE_CHILD_FIELDS[ast.Constant] = ()
+
+METRIC_NAMES = (
+    "cyclomatic_complexity",
+    "nesting_depth",
+    "function_length",
+    "parameter_count",
+    "class_coupling",
+    "cohesion",
+    "global_variable_usage",
+    "inheritance_depth",
+    "number_of_interfaces",
+    "polymorphism",
+    "calculate_import_complexity",
+)
+
+
+def class_profile(node):
     """
-    Calculate the cyclomatic complexity of a node in the AST.
-
-    The cyclomatic complexity is a software metric that measures the number of
-    linearly independent paths through a program's source code.
+    Walk a class definition once, gathering what the coupling and cohesion
+    scores need.
 
     Args:
-        node: An AST node.
+        node: An `ast.ClassDef` node.
 
     Returns:
-        A float between 0.0 and 1.0 representing the cyclomatic complexity of
-        the node. A value of 0.0 indicates that the node has no control flow
-        complexity, while a value of 1.0 indicates that the node has maximum
-        control flow complexity.
+        A tuple of a counter of the names referenced anywhere in the class
+        and a list holding the set of attribute names used by each method.
     """
 
-    complexity = 0
+    child_fields = NODE_CHILD_FIELDS
+    name_type = ast.Name
+    attribute_type = ast.Attribute
 
-    if isinstance(
-        node, (ast.If, ast.For, ast.While, ast.With, ast.Try, ast.ExceptHandler)
-    ):
-        complexity += 1
+    names = []
+    names_append = names.append
+    method_attrs = []
 
-    for child in ast.iter_child_nodes(node):
-        complexity += calculate_cyclomatic_complexity(child)
+    for part in ast.iter_child_nodes(node):
+        attrs = set()
+        attrs_add = attrs.add
 
-    return min(complexity / 10.0, 1.0)
+        stack = [part]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
 
+        while stack:
+            child = pop()
+            child_type = type(child)
+            fields = child_fields.get(child_type)
 
-def calculate_nesting_depth(node, current_depth=0) -> float:
-    """
-    Calculate the nesting depth of a node in the AST.
+            if fields is None:
+                continue
 
-    The nesting depth is a software metric that measures the maximum depth of
-    nested control structures in a program's source code.
+            if child_type is name_type:
+                names_append(child.id)
+                continue
+
+            if child_type is attribute_type:
+                attrs_add(child.attr)
+
+            for name in fields:
+                value = getattr(child, name)
+                if type(value) is list:
+                    extend(value)
+                else:
+                    push(value)
+
+        if type(part) in FUNC_TYPES:
+            method_attrs.append(attrs)
+
+    return collections.Counter(names), method_attrs
+
+
+def coupling_score(name_counts, class_names) -> float:
+    """
+    Score the class coupling of a class. Class coupling measures the number
+    of references a class makes to the classes defined in the module.
 
     Args:
-        node: An AST node.
-        current_depth: An integer representing the current nesting depth.
+        name_counts: A counter of the names referenced in the class, from
+            `class_profile`.
+        class_names: A set of class names in the AST.
 
     Returns:
-        A float between 0.0 and 1.0 representing the nesting depth of the node.
-        A value of 0.0 indicates that the node is not nested within any control
-        structures, while a value of 1.0 indicates that the node is nested to
-        the maximum depth.
+        A float between 0.0 and 1.0 representing the class coupling.
     """
 
-    if isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.Try)):
-        current_depth += 1
-
-    max_depth = current_depth
+    num_references = 0
 
-    for child in ast.iter_child_nodes(node):
-        max_depth = max(max_depth, calculate_nesting_depth(child, current_depth))
+    for name in class_names:
+        num_references += name_counts[name]
 
-    return min(max_depth / 5.0, 1.0)
+    return min(num_references / 10.0, 1.0)
 
 
-def calculate_function_length(node) -> float:
+def cohesion_score(method_attrs) -> float:
     """
-    Calculate the length of a function in lines of code.
+    Score the cohesion of a class. A method counts as cohesive when it uses
+    any attribute at all.
 
     Args:
-        node: An AST node.
+        method_attrs: A list of the attribute names used by each method, from
+            `class_profile`.
 
     Returns:
-        A float between 0.0 and 1.0 representing the length of the function.
-        A value of 0.0 indicates that the function is empty, while a value of
-        1.0 indicates that the function is very long.
+        A float between 0.0 and 1.0, where 0.0 means every method is
+        cohesive.
     """
 
-    if isinstance(node, ast.FunctionDef):
-        return min(len(node.body) / 50.0, 1.0)
+    if not method_attrs:
+        return 0.0
 
-    return 0.0
+    shared_methods = 0
+
+    for attrs in method_attrs:
+        if attrs:
+            shared_methods += 1
 
+    return 1.0 - (shared_methods / len(method_attrs))
 
-def calculate_parameter_count(node) -> float:
+
+class MetricVisitor:
+    """
+    Visit the AST once, accumulating the raw counts behind each score.
+
+    The handling for each node type is written inline in the traversal loop,
+    as identity tests against single node classes and membership tests
+    against the control-flow, nesting and function type sets, so a node
+    costs no method call. The tree is traversed with an explicit stack,
+    reading children straight from each node type's precomputed child
+    fields, so deeply nested source cannot exhaust the recursion limit.
+    Nesting and inheritance depth are carried on the stack, so no rule needs
+    a traversal of its own.
     """
-    Calculate the number of parameters in a function.
+
+    def __init__(self):
+        self.cc_count = 0
+        self.import_count = 0
+        self.max_nesting_depth = 0
+        self.max_inheritance_depth = 0
+
+        self.class_defs = []
+        self.func_defs = []
+        self.global_vars = set()
+        self.names = []
+
+    def visit(self, node):
+        child_fields = NODE_CHILD_FIELDS
+        cc_types = CC_TYPES
+        nest_types = NEST_TYPES
+        name_type = ast.Name
+        func_types = FUNC_TYPES
+        class_def = ast.ClassDef
+        import_type = ast.Import
+        import_from = ast.ImportFrom
+        global_type = ast.Global
+
+        names_append = self.names.append
+        func_defs_append = self.func_defs.append
+        class_defs_append = self.class_defs.append
+        cc_count = 0
+        import_count = 0
+        max_nesting = self.max_nesting_depth
+        max_inheritance = self.max_inheritance_depth
+
+        stack = [(node, 0, 0)]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+
+        while stack:
+            node, nesting, inheritance = pop()
+            node_type = type(node)
+            fields = child_fields.get(node_type)
+
+            if fields is None:
+                continue
+
+            if node_type is name_type:
+                names_append(node.id)
+                continue
+
+            if node_type in cc_types:
+                cc_count += 1
+                if node_type in nest_types:
+                    nesting += 1
+                    if nesting > max_nesting:
+                        max_nesting = nesting
+            elif node_type in func_types:
+                func_defs_append(node)
+            elif node_type is class_def:
+                class_defs_append(node)
+                inheritance += len(node.bases)
+                if inheritance > max_inheritance:
+                    max_inheritance = inheritance
+            elif node_type is import_type or node_type is import_from:
+                import_count += 1
+            elif node_type is global_type:
+                self.global_vars.update(node.names)
+
+            for name in fields:
+                value = getattr(node, name)
+                if type(value) is list:
+                    extend([(child, nesting, inheritance) for child in value])
+                else:
+                    push((value, nesting, inheritance))
+
+        self.cc_count += cc_count
+        self.import_count += import_count
+        self.max_nesting_depth = max_nesting
+        self.max_inheritance_depth = max_inheritance
+
+    def scores(self) -> list:
+        """
+        Score the counts gathered by the visit.
+
+        Metrics that depend on names defined anywhere in the module (class
+        names, global variables, class methods) are resolved here, once those
+        name sets are complete.
+
+        Returns:
+            A list of complexity scores, in the order of `METRIC_NAMES`.
+        """
+
+        class_defs = self.class_defs
+        func_defs = self.func_defs
+
+        class_names = {node.name for node in class_defs}
+        class_methods = {
+            method.name
+            for node in class_defs
+            for method in node.body
+            if type(method) in FUNC_TYPES
+        }
+
+        name_counts = collections.Counter(self.names)
+        global_usage = 0
+        for name in self.global_vars:
+            global_usage += name_counts[name]
+
+        profiles = [class_profile(node) for node in class_defs]
+
+        overridden = []
+        for node in class_defs:
+            count = 0
+            for method in node.body:
+                if type(method) in FUNC_TYPES and method.name in class_methods:
+                    count += 1
+            overridden.append(count)
+
+        return [
+            min(self.cc_count / 10.0, 1.0),
+            min(self.max_nesting_depth / 5.0, 1.0),
+            sum(min(len(node.body) / 50.0, 1.0) for node in func_defs),
+            sum(min(len(node.args.args) / 10.0, 1.0) for node in func_defs),
+            sum(coupling_score(counts, class_names) for (counts, _) in profiles),
+            sum(cohesion_score(method_attrs) for (_, method_attrs) in profiles),
+            min(global_usage / 10.0, 1.0),
+            min(self.max_inheritance_depth / 5.0, 1.0),
+            sum(min(len(node.bases) / 5.0, 1.0) for node in class_defs),
+            sum(min(count / 5.0, 1.0) for count in overridden),
+            min(self.import_count / 20.0, 1.0),
+        ]
+
+
+def calculate_cyclomatic_complexity(node) -> float:
+    """
+    Calculate the cyclomatic complexity of a node in the AST.
+
+    The cyclomatic complexity is a software metric that measures the number of
+    linearly independent paths through a program's source code.
 
     Args:
         node: An AST node.
 
     Returns:
-        A float between 0.0 and 1.0 representing the number of parameters in
-        the function. A value of 0.0 indicates that the function has no
-        parameters, while a value of 1.0 indicates that the function has many
-        parameters.
+        A float between 0.0 and 1.0 representing the cyclomatic complexity of
+        the node. A value of 0.0 indicates that the node has no control flow
+        complexity, while a value of 1.0 indicates that the node has maximum
+        control flow complexity.
     """
 
-    if isinstance(node, ast.FunctionDef):
-        return min(len(node.args.args) / 10.0, 1.0)
-
-    return 0.0
+    visitor = MetricVisitor()
+    visitor.visit(node)
+    return min(visitor.cc_count / 10.0, 1.0)
 
 
-def calculate_class_coupling(node, class_names) -> float:
+def calculate_nesting_depth(node, current_depth=0) -> float:
     """
-    Calculate the class coupling of a node in the AST. Class coupling is a
-    measures the number of other classes that a class is dependent on.
+    Calculate the nesting depth of a node in the AST.
+
+    The nesting depth is a software metric that measures the maximum depth of
+    nested control structures in a program's source code.
 
     Args:
         node: An AST node.
-        class_names: A set of class names in the AST.
+        current_depth: An integer representing the current nesting depth.
 
     Returns:
-        A float between 0.0 and 1.0 representing the class coupling of the node.
+        A float between 0.0 and 1.0 representing the nesting depth of the node.
+        A value of 0.0 indicates that the node is not nested within any control
+        structures, while a value of 1.0 indicates that the node is nested to
+        the maximum depth.
     """
 
-    if isinstance(node, ast.ClassDef):
-        num_references = sum(
-            isinstance(child, ast.Name) and child.id in class_names
-            for child in ast.walk(node)
-        )
-
-        return min(num_references / 10.0, 1.0)
-
-    return 0.0
+    visitor = MetricVisitor()
+    visitor.visit(node)
+    return min((current_depth + visitor.max_nesting_depth) / 5.0, 1.0)
 
 
 def calculate_cohesion(node) -> float:
     """
     Calculate the cohesion of a class in the AST. Cohesion is a measure of how
-    closely related the methods of a class are to each other.
+    closely related the methods of a class are to each other; a method counts
+    as cohesive when it uses any attribute at all.
 
     Args:
         node: An AST node.
@@ -135,18 +386,9 @@ def calculate_cohesion(node) -> float:
         A float between 0.0 and 1.0 representing the cohesion of the class.
     """
 
-    if isinstance(node, ast.ClassDef):
-        methods = [n for n in node.body if isinstance(n, ast.FunctionDef)]
-
-        if not methods:
-            return 0.0
-
-        attributes = {n.attr for n in ast.walk(node) if isinstance(n, ast.Attribute)}
-        shared_attributes = sum(
-            any(attr in attributes for attr in ast.walk(method)) for method in methods
-        )
-
-        return 1.0 - (shared_attributes / len(methods))
+    if type(node) is ast.ClassDef:
+        _, method_attrs = class_profile(node)
+        return cohesion_score(method_attrs)
 
     return 0.0
 
@@ -164,10 +406,14 @@ def calculate_global_variable_usage(node, global_vars) -> float:
         in the node.
     """
 
-    usage_count = sum(
-        isinstance(child, ast.Name) and child.id in global_vars
-        for child in ast.walk(node)
-    )
+    visitor = MetricVisitor()
+    visitor.visit(node)
+
+    usage_count = 0
+
+    for name in visitor.names:
+        if name in global_vars:
+            usage_count += 1
 
     return min(usage_count / 10.0, 1.0)
 
@@ -189,77 +435,10 @@ def calculate_inheritance_depth(node, depth=0) -> float:
         other classes, while a value of 1.0 indicates that the class has maximum
         inheritance depth.
     """
-    if isinstance(node, ast.ClassDef):
-        depth += len(node.bases)
-
-    max_depth = depth
-
-    for child in ast.iter_child_nodes(node):
-        max_depth = max(max_depth, calculate_inheritance_depth(child, depth))
-
-    return min(max_depth / 5.0, 1.0)
-
-
-def calculate_number_of_interfaces(node) -> float:
-    """
-    Calculate the number of interfaces implemented by a class in the AST.
-
-    Args:
-        node: An AST node.
-
-    Returns:
-        A float between 0.0 and 1.0 representing the number of interfaces
-        implemented by the class. A value of 0.0 indicates that the class does
-        not implement any interfaces, while a value of 1.0 indicates that the
-        class implements many interfaces.
-    """
-
-    if isinstance(node, ast.ClassDef):
-        return min(len(node.bases) / 5.0, 1.0)
-
-    return 0.0
-
-
-def calculate_polymorphism(node, class_methods) -> float:
-    """
-    Calculate the polymorphism of a class in the AST.
-
-    Polymorphism is a software metric that measures the number of methods in a
-    class that override methods in its parent classes.
-
-    Args:
-        node: An AST node.
-        class_methods: A set of method names in the class.
-
-    Returns:
-        A float between 0.0 and 1.0 representing the polymorphism of the class.
-    """
-
-    if isinstance(node, ast.ClassDef):
-        overridden_methods = sum(
-            isinstance(child, ast.FunctionDef) and child.name in class_methods
-            for child in node.body
-        )
-
-        return min(overridden_methods / 5.0, 1.0)
-
-    return 0.0
-
-
-def calculate_import_count(node) -> int:
-    """
-    Calculate the number of import statements in the AST.
-
-    Args:
-        node: An AST node.
-
-    Returns:
-        An integer representing the number of import statements in the AST.
-    """
 
-    if isinstance(node, (ast.Import, ast.ImportFrom)):
-        return 1
-    return 0
+    visitor = MetricVisitor()
+    visitor.visit(node)
+    return min((depth + visitor.max_inheritance_depth) / 5.0, 1.0)
 
 
 def calculate_import_complexity(tree) -> float:
@@ -276,5 +455,6 @@ def calculate_import_complexity(tree) -> float:
         many import statements.
     """
 
-    import_count = sum(calculate_import_count(node) for node in ast.walk(tree))
-    return min(import_count / 20.0, 1.0)
+    visitor = MetricVisitor()
+    visitor.visit(tree)
+    return min(visitor.import_count / 20.0, 1.0)